@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
+import hashlib
+import itertools
 import os
-from flask import Flask, request, make_response, jsonify
+import threading
+import orjson
+from cachetools import TTLCache
+from flask import Flask, request
 from flask_migrate import Migrate
 from flask_restful import Api, Resource
+from sqlalchemy import event, literal, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.exc import IntegrityError # Import for handling database integrity errors
 
 # Import db and models here. db is initialized *later* with app.init_app(app).
 # This is crucial to avoid circular imports.
-from models import db, Restaurant, Pizza, RestaurantPizza
+from models import db, is_valid_price, prevalidated, Restaurant, Pizza, RestaurantPizza
 
 # Define base directory for SQLite database path
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -18,12 +26,61 @@ DATABASE = os.environ.get("DB_URI", f"sqlite:///{os.path.join(BASE_DIR, 'app.db'
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False # Suppress SQLAlchemy track modifications warning
-app.json.compact = False # Ensure JSON output is formatted for readability
+
+# Engine/connection pool options.
+# For server databases, pool_size + max_overflow should equal the maximum number
+# of threads/greenlets per worker that can hold a connection at once, otherwise
+# requests queue up waiting on the pool. pool_pre_ping drops dead connections
+# and pool_recycle avoids server-side idle timeouts.
+if DATABASE.startswith("sqlite"):
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        # Allow pooled connections to be used from the dev server's threads, and
+        # wait up to 30s for a write lock instead of failing immediately.
+        "connect_args": {"check_same_thread": False, "timeout": 30},
+    }
+    if ":memory:" in DATABASE or DATABASE in ("sqlite://", "sqlite:///"):
+        # An in-memory database only exists on one connection, so share it.
+        SQLALCHEMY_ENGINE_OPTIONS["poolclass"] = StaticPool
+else:
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.environ.get("DB_POOL", 10)),
+        "max_overflow": int(os.environ.get("DB_OVERFLOW", 20)),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = SQLALCHEMY_ENGINE_OPTIONS
 
 # Initialize SQLAlchemy with the Flask application context.
 # This connects the 'db' object (from models.py) to your Flask application.
 db.init_app(app)
 
+# SQLite connection tuning. WAL lets GET requests read while a write is in
+# progress, and synchronous=NORMAL only fsyncs at WAL checkpoints instead of
+# on every commit. foreign_keys is off by default in SQLite, so enable it here.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # negative value = size in KiB (~8MB)
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256MB
+    "PRAGMA journal_size_limit=6144000",  # keep the WAL file from growing unbounded
+    "PRAGMA foreign_keys=ON",
+)
+
+def set_sqlite_pragmas(dbapi_conn, connection_record):
+    """
+    Applies SQLITE_PRAGMAS to every new DBAPI connection opened by the engine.
+    """
+    cursor = dbapi_conn.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+# db.engine is only available inside an application context.
+with app.app_context():
+    if db.engine.dialect.name == "sqlite":
+        event.listen(db.engine, "connect", set_sqlite_pragmas)
+
 # Initialize Flask-Migrate for database schema management
 migrate = Migrate(app, db)
 
@@ -32,47 +89,231 @@ api = Api(app)
 
 # --- Helper Functions for Consistent API Responses ---
 
+def json_response(payload, status_code=200):
+    """
+    Creates a JSON response encoded with orjson.
+    Args:
+        payload (dict | list): The data to encode.
+        status_code (int): The HTTP status code (default: 200 OK).
+    Returns:
+        flask.Response: A Flask response object.
+    """
+    return json_bytes_response(orjson.dumps(payload), status_code)
+
+def json_bytes_response(body, status_code=200):
+    """
+    Creates a JSON response from an already-encoded body.
+    The body is complete, so it is passed straight through to the WSGI server
+    (direct_passthrough) instead of being re-iterated and re-encoded on the way
+    out. Content-Length is set from the bytes when the response is created.
+    Args:
+        body (bytes): The encoded JSON.
+        status_code (int): The HTTP status code (default: 200 OK).
+    Returns:
+        flask.Response: A Flask response object.
+    """
+    response = app.response_class(body, status=status_code, mimetype="application/json")
+    response.direct_passthrough = True
+    return response
+
+# Per-process cache of the encoded bodies of the list endpoints, keyed by
+# endpoint name. Entries expire after RESPONSE_CACHE_TTL seconds and are
+# dropped as soon as this process commits any write to the database.
+RESPONSE_CACHE_TTL = 30
+response_cache = TTLCache(maxsize=8, ttl=RESPONSE_CACHE_TTL)
+response_cache_lock = threading.Lock() # TTLCache is not thread-safe
+# Bumped whenever a write is committed. A body is only stored if the version
+# is unchanged since its data was read, so a body built from rows read before
+# that commit never lands in the cache after the commit has cleared it.
+data_versions = itertools.count()
+data_version = next(data_versions)
+
+@event.listens_for(Session, "after_flush")
+def mark_session_written(session, flush_context):
+    # Flushed rows aren't visible to other connections until the commit, so
+    # only note the write here and invalidate in clear_response_cache().
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_rollback")
+def unmark_session_written(session):
+    session.info.pop("has_writes", None)
+
+@event.listens_for(Session, "after_commit")
+def clear_response_cache(session):
+    global data_version
+    if session.info.pop("has_writes", False):
+        with response_cache_lock:
+            response_cache.clear()
+            data_version = next(data_versions)
+
+def cached_json_response(key, build_payload):
+    """
+    Returns a 200 JSON response whose encoded body is cached under `key`.
+    The response carries a weak ETag derived from the body; if the request's
+    If-None-Match already has it, an empty 304 response is returned instead.
+    Args:
+        key (str): The cache key, e.g. the endpoint name.
+        build_payload (callable): Returns the data to encode on a cache miss.
+    Returns:
+        flask.Response: A Flask response object.
+    """
+    with response_cache_lock:
+        cached = response_cache.get(key)
+        version = data_version
+    if cached is None:
+        body = orjson.dumps(build_payload())
+        # Hashing the body (rather than using data_version) keeps ETags valid
+        # across worker processes and cache expiry.
+        cached = (body, hashlib.blake2b(body, digest_size=12).hexdigest())
+        with response_cache_lock:
+            if version == data_version:
+                response_cache[key] = cached
+    body, etag = cached
+
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = json_bytes_response(body, 200)
+    response.set_etag(etag, weak=True)
+    return response
+
+# Responses that never change are built once at import time and shared
+# between requests. Nothing in this app mutates a response after the view
+# returns it (no after_request hooks, sessions or cookies).
+ERROR_RESPONSES = {
+    (message, 404): json_response({"error": message}, 404)
+    for message in ("Restaurant not found", "Pizza not found")
+}
+# Validation error responses are keyed by the tuple of their error strings.
+VALIDATION_ERROR_RESPONSES = {
+    (tuple(errors), 400): json_response({"errors": errors}, 400)
+    for errors in (
+        ["validation errors"],
+        ["Missing required fields: price, pizza_id, restaurant_id"],
+        ["Request body must be a JSON object"],
+        ["A database integrity error occurred (e.g., duplicate entry or invalid foreign key reference)."],
+    )
+}
+
+# Shared empty 204 No Content response for successful deletes.
+NO_CONTENT_RESPONSE = app.response_class(status=204)
+
 def make_error_response(message, status_code):
     """
     Creates a standardized JSON error response.
+    Known messages return a prebuilt shared response from ERROR_RESPONSES.
     Args:
         message (str): The specific error message.
         status_code (int): The HTTP status code (e.g., 404, 500).
     Returns:
         flask.Response: A Flask response object.
     """
-    return make_response(jsonify({"error": message}), status_code)
+    response = ERROR_RESPONSES.get((message, status_code))
+    if response is None:
+        response = json_response({"error": message}, status_code)
+    return response
 
 def make_validation_error_response(errors, status_code=400):
     """
     Creates a standardized JSON validation error response.
+    Known error lists return a prebuilt shared response from
+    VALIDATION_ERROR_RESPONSES.
     Args:
         errors (list): A list of error strings.
         status_code (int): The HTTP status code (default: 400 Bad Request).
     Returns:
         flask.Response: A Flask response object.
     """
-    return make_response(jsonify({"errors": errors}), status_code)
+    response = VALIDATION_ERROR_RESPONSES.get((tuple(errors), status_code))
+    if response is None:
+        response = json_response({"errors": errors}, status_code)
+    return response
+
+def parse_json():
+    """
+    Parses the request body with orjson.
+    Returns:
+        The decoded JSON value, or None if the body is not valid JSON.
+        An empty body decodes to an empty dict.
+    """
+    try:
+        return orjson.loads(request.get_data() or b"{}")
+    except orjson.JSONDecodeError:
+        return None
+
+def parse_id(value):
+    """
+    Converts a JSON ID to an int.
+    Args:
+        value: An int, or a string of digits (as sent by the React form).
+    Returns:
+        int | None: The ID, or None if the value isn't a valid ID.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+def is_foreign_key_violation(error):
+    """
+    Checks whether an IntegrityError was caused by a foreign key constraint.
+    Args:
+        error (IntegrityError): The error raised by SQLAlchemy.
+    Returns:
+        bool: True for foreign key violations (SQLite and PostgreSQL wording).
+    """
+    return "foreign key" in str(error.orig).lower()
+
+def find_existing_parents(restaurant_ids, pizza_ids):
+    """
+    Looks up which of the given restaurant and pizza IDs exist, in one query.
+    Takes collections so that a batch of RestaurantPizza rows can be checked
+    with the same single round trip as one row.
+    Args:
+        restaurant_ids (iterable): Restaurant IDs to check.
+        pizza_ids (iterable): Pizza IDs to check.
+    Returns:
+        tuple: (set of existing restaurant IDs, set of existing pizza IDs).
+    """
+    query = select(literal("restaurant"), Restaurant.id).where(
+        Restaurant.id.in_(restaurant_ids)
+    ).union_all(
+        select(literal("pizza"), Pizza.id).where(Pizza.id.in_(pizza_ids))
+    )
+    existing = {"restaurant": set(), "pizza": set()}
+    for kind, id_ in db.session.execute(query):
+        existing[kind].add(id_)
+    return existing["restaurant"], existing["pizza"]
 
 # --- API Resources (Flask-RESTful) ---
 
 # Default route for basic testing of the API
+INDEX_RESPONSE = app.response_class(b"<h1>Restaurant-Pizza API</h1>", mimetype="text/html")
+
 @app.route("/")
 def index():
-    return "<h1>Restaurant-Pizza API</h1>"
+    return INDEX_RESPONSE
 
 # Resource for handling GET requests to /restaurants
 class Restaurants(Resource):
     def get(self):
         """
         Retrieves all restaurants from the database.
-        Returns a list of restaurant objects. Serialization rules in the model
-        prevent excessive nesting, providing a concise overview.
+        Returns a list of restaurant objects without their restaurant_pizzas,
+        providing a concise overview. The encoded list is cached between writes,
+        and clients sending a matching If-None-Match get a 304.
         """
-        restaurants = Restaurant.query.all()
-        # Use to_dict() method from SerializerMixin, applying rules to limit recursion.
-        serialized_restaurants = [r.to_dict(rules=('-restaurant_pizzas',)) for r in restaurants]
-        return make_response(jsonify(serialized_restaurants), 200)
+        return cached_json_response("restaurants", self.serialize_restaurants)
+
+    @staticmethod
+    def serialize_restaurants():
+        # Only plain columns are returned, so select them as lightweight rows
+        # instead of building full ORM instances.
+        rows = db.session.execute(
+            select(Restaurant.id, Restaurant.name, Restaurant.address)
+        ).mappings()
+        return [dict(row) for row in rows]
 
 api.add_resource(Restaurants, "/restaurants")
 
@@ -82,20 +323,22 @@ class RestaurantByID(Resource):
         """
         Retrieves a single restaurant by its ID.
         If found, returns the restaurant details including its associated
-        restaurant_pizzas, which will contain nested pizza details based
-        on RestaurantPizza's serialize_rules.
+        restaurant_pizzas, each with nested pizza details.
         If not found, returns a 404 error.
         """
-        restaurant = Restaurant.query.get(id)
+        # Eager-load restaurant_pizzas and their pizzas with two IN-clause queries
+        # rather than one lazy load per RestaurantPizza during serialization.
+        restaurant = db.session.get(
+            Restaurant,
+            id,
+            options=[selectinload(Restaurant.restaurant_pizzas).selectinload(RestaurantPizza.pizza)],
+        )
         if not restaurant:
             return make_error_response("Restaurant not found", 404)
 
         # FIX FOR PYTEST FAILURE 1:
         # The test expects 'restaurant_pizzas' key directly.
-        # Simply return the restaurant.to_dict() which will include
-        # 'restaurant_pizzas' key and let the model's serialize_rules
-        # handle the nesting of pizza within each RestaurantPizza object.
-        return make_response(jsonify(restaurant.to_dict()), 200)
+        return json_response(restaurant.to_dict(include_restaurant_pizzas=True), 200)
 
     def delete(self, id):
         """
@@ -105,14 +348,14 @@ class RestaurantByID(Resource):
         all associated RestaurantPizza entries for this restaurant will also be deleted.
         Returns a 204 No Content response on successful deletion, or a 404 if not found.
         """
-        restaurant = Restaurant.query.get(id)
+        restaurant = db.session.get(Restaurant, id)
         if not restaurant:
             return make_error_response("Restaurant not found", 404)
 
         try:
             db.session.delete(restaurant)
             db.session.commit()
-            return make_response("", 204) # 204 No Content, indicating successful deletion
+            return NO_CONTENT_RESPONSE # 204 No Content, indicating successful deletion
         except Exception as e:
             db.session.rollback() # Rollback changes if an error occurs during deletion
             # Generic error message for unexpected issues during delete
@@ -125,13 +368,19 @@ class Pizzas(Resource):
     def get(self):
         """
         Retrieves all pizzas from the database.
-        Returns a list of pizza objects. Serialization rules in the model
-        prevent excessive nesting.
+        Returns a list of pizza objects without their restaurant_pizzas.
+        The encoded list is cached between writes, and clients sending a
+        matching If-None-Match get a 304.
         """
-        pizzas = Pizza.query.all()
-        # Use to_dict() with serialization rules to limit recursion.
-        serialized_pizzas = [p.to_dict(rules=('-restaurant_pizzas',)) for p in pizzas]
-        return make_response(jsonify(serialized_pizzas), 200)
+        return cached_json_response("pizzas", self.serialize_pizzas)
+
+    @staticmethod
+    def serialize_pizzas():
+        # Plain column rows, as in Restaurants.serialize_restaurants().
+        rows = db.session.execute(
+            select(Pizza.id, Pizza.name, Pizza.ingredients)
+        ).mappings()
+        return [dict(row) for row in rows]
 
 api.add_resource(Pizzas, "/pizzas")
 
@@ -141,60 +390,62 @@ class RestaurantPizzas(Resource):
         """
         Creates a new RestaurantPizza entry.
         Requires 'price', 'pizza_id', and 'restaurant_id' in the request body.
-        Validates the price using the model's @validates decorator.
-        Ensures both pizza and restaurant exist before creating the association.
+        The payload is validated up front, so invalid requests are rejected
+        before any model instance or database work.
+        The restaurant and pizza are not looked up beforehand: the insert is
+        attempted directly and a foreign key violation is turned into a 404.
         Returns the newly created RestaurantPizza object (with associated restaurant
         and pizza details) on success (201 Created), or appropriate error messages.
         """
-        data = request.get_json()
+        data = parse_json()
+        if not isinstance(data, dict):
+            return make_validation_error_response(["Request body must be a JSON object"])
 
-        # Extract required data from the request body
-        price = data.get("price")
-        pizza_id = data.get("pizza_id")
-        restaurant_id = data.get("restaurant_id")
-
-        # 1. Basic validation: check for presence of all required fields
-        if not all([price is not None, pizza_id is not None, restaurant_id is not None]):
+        # 1. Basic validation: all required fields present and price in range
+        try:
+            price, pizza_id, restaurant_id = data["price"], data["pizza_id"], data["restaurant_id"]
+        except KeyError:
             return make_validation_error_response(["Missing required fields: price, pizza_id, restaurant_id"])
-
-        # 2. Check if the provided restaurant_id and pizza_id exist in the database
-        restaurant = Restaurant.query.get(restaurant_id)
-        pizza = Pizza.query.get(pizza_id)
-
-        if not restaurant:
-            return make_error_response("Restaurant not found", 404)
-        if not pizza:
-            return make_error_response("Pizza not found", 404)
+        if price is None or pizza_id is None or restaurant_id is None:
+            return make_validation_error_response(["Missing required fields: price, pizza_id, restaurant_id"])
+        if not is_valid_price(price):
+            # FIX FOR PYTEST FAILURE 2:
+            # The test specifically expects ["validation errors"].
+            return make_validation_error_response(["validation errors"])
+        pizza_id, restaurant_id = parse_id(pizza_id), parse_id(restaurant_id)
+        if pizza_id is None or restaurant_id is None:
+            return make_validation_error_response(["validation errors"])
 
         try:
-            # 3. Create a new RestaurantPizza instance
-            new_rp = RestaurantPizza(
-                price=price,
-                pizza_id=pizza_id,
-                restaurant_id=restaurant_id,
-            )
+            # 2. Create a new RestaurantPizza instance. The session keeps these
+            # values after the commit (expire_on_commit=False) and they are echoed
+            # in the response, so store them with the column types (Float price).
+            # The price was validated above, so skip the model's price validator.
+            with prevalidated():
+                new_rp = RestaurantPizza(
+                    price=float(price),
+                    pizza_id=pizza_id,
+                    restaurant_id=restaurant_id,
+                )
 
             # Add and commit the new entry to the database.
-            # The @validates decorators in the RestaurantPizza model will
-            # automatically run here and raise a ValueError if price is invalid.
             db.session.add(new_rp)
             db.session.commit()
 
-            # 4. Return the newly created object.
-            # The to_dict() method will serialize the object, and the
-            # serialize_rules in the RestaurantPizza model ensure that associated
-            # restaurant and pizza details are included without causing recursion.
-            return make_response(jsonify(new_rp.to_dict()), 201)
+            # 3. Return the newly created object, including the associated
+            # restaurant and pizza details.
+            return json_response(new_rp.to_dict(), 201)
 
-        except ValueError as e:
-            # FIX FOR PYTEST FAILURE 2:
-            # The test specifically expects ["validation errors"].
-            db.session.rollback() # Rollback the session to undo the failed addition
-            return make_validation_error_response(["validation errors"])
-        except IntegrityError:
-            # Catch database integrity errors (e.g., if you tried to add a duplicate
-            # entry on a unique constraint, or a foreign key that doesn't exist).
+        except IntegrityError as e:
             db.session.rollback()
+            # A foreign key violation means the restaurant or pizza doesn't exist.
+            # This is the uncommon path, so only now look up which one is missing.
+            if is_foreign_key_violation(e):
+                restaurant_ids, _ = find_existing_parents([restaurant_id], [pizza_id])
+                if not restaurant_ids:
+                    return make_error_response("Restaurant not found", 404)
+                return make_error_response("Pizza not found", 404)
+            # Otherwise this restaurant already lists this pizza (uq_rp_restaurant_pizza).
             return make_validation_error_response(["A database integrity error occurred (e.g., duplicate entry or invalid foreign key reference)."])
         except Exception as e:
             # Catch any other unexpected errors during the process
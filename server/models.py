@@ -1,10 +1,11 @@
 # models.py
+from contextlib import contextmanager
+from contextvars import ContextVar
 # Import necessary modules from SQLAlchemy
 from flask_sqlalchemy import SQLAlchemy # This is needed for the db object creation
-from sqlalchemy import MetaData, Column, Integer, String, Float, ForeignKey # Explicitly import Column types
+from sqlalchemy import MetaData, Column, Integer, String, Float, ForeignKey, Index, UniqueConstraint # Explicitly import Column types
 from sqlalchemy.orm import validates # Used for custom validation methods on models
 from sqlalchemy.ext.associationproxy import association_proxy # For simplified many-to-many access
-from sqlalchemy_serializer import SerializerMixin # For easy model-to-dict serialization
 
 # Define metadata for naming conventions, useful for auto-generated foreign key names
 metadata = MetaData(
@@ -15,10 +16,35 @@ metadata = MetaData(
 
 # Initialize SQLAlchemy DB object. This 'db' instance will be connected to the Flask app
 # via db.init_app(app) in app.py. It uses the metadata defined above.
-db = SQLAlchemy(metadata=metadata)
-
-# Define the Restaurant model, inheriting from db.Model and SerializerMixin
-class Restaurant(db.Model, SerializerMixin):
+# expire_on_commit=False keeps loaded attributes after a commit, so serializing an
+# object right after committing it doesn't reload every column from the database.
+db = SQLAlchemy(metadata=metadata, session_options={"expire_on_commit": False})
+
+# Plain validation helpers, shared by the model validators below and by the API,
+# which checks request payloads with them before creating any model instance.
+MIN_PRICE = 1
+MAX_PRICE = 30
+
+def is_valid_price(value):
+    # bool is a subclass of int, so True/False are accepted as 1/0 like before.
+    return isinstance(value, (int, float)) and MIN_PRICE <= value <= MAX_PRICE
+
+# Switch for the RestaurantPizza price validator. It is on by default; callers
+# that have already run is_valid_price() on their data turn it off with
+# prevalidated() so the check isn't repeated. A ContextVar keeps the switch
+# local to the current thread/request.
+price_validation_enabled = ContextVar("price_validation_enabled", default=True)
+
+@contextmanager
+def prevalidated():
+    token = price_validation_enabled.set(False)
+    try:
+        yield
+    finally:
+        price_validation_enabled.reset(token)
+
+# Define the Restaurant model
+class Restaurant(db.Model):
     __tablename__ = "restaurants" # Name of the database table
 
     # Define table columns
@@ -37,11 +63,15 @@ class Restaurant(db.Model, SerializerMixin):
     # This creates a 'many-to-many' feel without explicitly defining it here.
     pizzas = association_proxy("restaurant_pizzas", "pizza")
 
-    # Define serialization rules for `to_dict()` from SerializerMixin.
-    # The rule '-restaurant_pizzas.restaurant' tells the serializer to exclude the 'restaurant'
-    # attribute *within* the serialized 'restaurant_pizzas' list. This prevents infinite recursion
-    # when serializing deeply nested relationships.
-    serialize_rules = ("-restaurant_pizzas.restaurant",)
+    # Serialize the restaurant to a plain dict. The 'restaurant_pizzas' list is only
+    # included when requested; each entry omits its 'restaurant' to avoid recursion.
+    def to_dict(self, include_restaurant_pizzas=False):
+        data = {"id": self.id, "name": self.name, "address": self.address}
+        if include_restaurant_pizzas:
+            data["restaurant_pizzas"] = [
+                rp.to_dict(include_restaurant=False) for rp in self.restaurant_pizzas
+            ]
+        return data
 
     # Custom validation for the 'name' attribute using SQLAlchemy's @validates decorator.
     @validates('name')
@@ -65,7 +95,7 @@ class Restaurant(db.Model, SerializerMixin):
         return f"<Restaurant {self.id}: {self.name}>"
 
 # Define the Pizza model
-class Pizza(db.Model, SerializerMixin):
+class Pizza(db.Model):
     __tablename__ = "pizzas" # Name of the database table
 
     # Define table columns
@@ -82,9 +112,9 @@ class Pizza(db.Model, SerializerMixin):
     # Association proxy to easily access Restaurant objects directly from a Pizza instance.
     restaurants = association_proxy("restaurant_pizzas", "restaurant")
 
-    # Serialization rules for `to_dict()`.
-    # Exclude the 'pizza' attribute within 'restaurant_pizzas' to prevent recursion.
-    serialize_rules = ("-restaurant_pizzas.pizza",)
+    # Serialize the pizza to a plain dict (columns only).
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "ingredients": self.ingredients}
 
     # Custom validation for the 'name' attribute.
     @validates('name')
@@ -105,7 +135,7 @@ class Pizza(db.Model, SerializerMixin):
         return f"<Pizza {self.id}: {self.name}, {self.ingredients}>"
 
 # Define the RestaurantPizza model (the association table for the many-to-many relationship)
-class RestaurantPizza(db.Model, SerializerMixin):
+class RestaurantPizza(db.Model):
     __tablename__ = "restaurant_pizzas" # Name of the database table
 
     # Define table columns
@@ -115,6 +145,16 @@ class RestaurantPizza(db.Model, SerializerMixin):
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
     pizza_id = Column(Integer, ForeignKey("pizzas.id"), nullable=False)
 
+    # A restaurant can list each pizza only once. The unique index on
+    # (restaurant_id, pizza_id) also serves lookups by restaurant_id.
+    # SQLite doesn't index foreign key columns automatically, so pizza_id gets its
+    # own index. It is named explicitly because the metadata naming convention
+    # above only covers foreign keys.
+    __table_args__ = (
+        UniqueConstraint("restaurant_id", "pizza_id", name="uq_rp_restaurant_pizza"),
+        Index("ix_restaurant_pizzas_pizza_id", "pizza_id"),
+    )
+
     # Define the many-to-one relationship to Restaurant.
     # 'restaurant' will be the actual Restaurant object this RestaurantPizza belongs to.
     # 'back_populates' creates a bidirectional link with 'restaurant_pizzas' in the Restaurant model.
@@ -125,20 +165,37 @@ class RestaurantPizza(db.Model, SerializerMixin):
     # 'back_populates' creates a bidirectional link with 'restaurant_pizzas' in the Pizza model.
     pizza = db.relationship("Pizza", back_populates="restaurant_pizzas")
 
-    # Serialization rules for `to_dict()`.
-    # When serializing a RestaurantPizza, we want to include details of the related
-    # restaurant and pizza. However, to prevent recursion, we exclude their own
-    # 'restaurant_pizzas' lists within those nested objects.
-    serialize_rules = ("-restaurant.restaurant_pizzas", "-pizza.restaurant_pizzas")
+    # Serialize the RestaurantPizza to a plain dict, including the related pizza and
+    # (unless nested inside a restaurant) the related restaurant. The nested objects
+    # never include their own 'restaurant_pizzas' lists, which prevents recursion.
+    # Nested dicts are written out inline so each call is a single dict literal
+    # with no further method calls; keep them in sync with Pizza/Restaurant.to_dict.
+    # Restaurant.to_dict(include_restaurant_pizzas=True) uses include_restaurant=False.
+    def to_dict(self, include_restaurant=True):
+        pizza = self.pizza
+        data = {
+            "id": self.id,
+            "price": self.price,
+            "pizza_id": self.pizza_id,
+            "restaurant_id": self.restaurant_id,
+            "pizza": {"id": pizza.id, "name": pizza.name, "ingredients": pizza.ingredients},
+        }
+        if include_restaurant:
+            restaurant = self.restaurant
+            data["restaurant"] = {
+                "id": restaurant.id,
+                "name": restaurant.name,
+                "address": restaurant.address,
+            }
+        return data
 
     # Custom validation for the 'price' attribute.
     @validates("price")
     def validate_price(self, key, value):
-        if not isinstance(value, (int, float)): # Check if price is a number (int or float)
-            raise ValueError("Price must be a number.")
-        # Ensure price is within the allowed range (between 1 and 30 inclusive)
-        if not (1 <= value <= 30):
-            raise ValueError("Price must be between 1 and 30 (inclusive).")
+        # Ensure price is a number within the allowed range (between 1 and 30 inclusive),
+        # unless the caller already checked it (see prevalidated()).
+        if price_validation_enabled.get() and not is_valid_price(value):
+            raise ValueError(f"Price must be a number between {MIN_PRICE} and {MAX_PRICE} (inclusive).")
         return value # Return the validated value
 
     # String representation for debugging
@@ -1,3 +1,4 @@
+import threading
 from models import Restaurant, RestaurantPizza, Pizza
 from app import app, db
 from faker import Faker
@@ -113,6 +114,47 @@ class TestApp:
             for pizza in response:
                 assert 'restaurant_pizzas' not in pizza
 
+    def test_pizzas_not_stale_after_concurrent_read(self):
+        '''does not keep serving /pizzas data read by another request between a write's flush and its commit.'''
+        with app.app_context():
+            fake = Faker()
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add(pizza)
+            db.session.flush()
+
+            # Another request (own thread, app context and connection) reads
+            # the pizzas before the write above is committed.
+            thread = threading.Thread(
+                target=lambda: app.test_client().get('/pizzas'))
+            thread.start()
+            thread.join()
+
+            db.session.commit()
+
+            response = app.test_client().get('/pizzas')
+            assert pizza.id in [p['id'] for p in response.json]
+
+    def test_pizzas_not_modified(self):
+        '''returns 304 with no body for GET request to /pizzas when If-None-Match matches the ETag.'''
+        with app.app_context():
+            response = app.test_client().get('/pizzas')
+            etag = response.headers['ETag']
+            assert etag
+
+            response = app.test_client().get(
+                '/pizzas', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert response.data == b''
+
+            fake = Faker()
+            db.session.add(Pizza(name=fake.name(), ingredients=fake.sentence()))
+            db.session.commit()
+
+            response = app.test_client().get(
+                '/pizzas', headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+
     def test_creates_restaurant_pizzas(self):
         '''creates one restaurant_pizzas using a pizza_id, restaurant_id, and price with a POST request to /restaurant_pizzas.'''
 
@@ -154,6 +196,32 @@ class TestApp:
                 RestaurantPizza.restaurant_id == restaurant.id, RestaurantPizza.pizza_id == pizza.id).first()
             assert query_result.price == 3
 
+    def test_creates_restaurant_pizzas_with_string_ids(self):
+        '''returns typed values when a POST request to /restaurant_pizzas sends IDs as strings.'''
+
+        with app.app_context():
+            fake = Faker()
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            db.session.add(pizza)
+            db.session.add(restaurant)
+            db.session.commit()
+
+            response = app.test_client().post(
+                '/restaurant_pizzas',
+                json={
+                    "price": 5,
+                    "pizza_id": str(pizza.id),
+                    "restaurant_id": str(restaurant.id),
+                }
+            )
+
+            assert response.status_code == 201
+            assert b'"price":5.0' in response.data
+            response = response.json
+            assert response['pizza_id'] == pizza.id
+            assert response['restaurant_id'] == restaurant.id
+
     def test_400_for_validation_error(self):
         '''returns a 400 status code and error message if a POST request to /restaurant_pizzas fails.'''
 
@@ -189,3 +257,54 @@ class TestApp:
 
             assert response.status_code == 400
             assert response.json['errors'] == ["validation errors"]
+
+    def test_400_for_invalid_ids(self):
+        '''returns a 400 status code and error message if a POST request to /restaurant_pizzas has non-integer IDs.'''
+
+        with app.app_context():
+            response = app.test_client().post(
+                '/restaurant_pizzas',
+                json={
+                    "price": 5,
+                    "pizza_id": [1],
+                    "restaurant_id": 1,
+                }
+            )
+
+            assert response.status_code == 400
+            assert response.json['errors'] == ["validation errors"]
+
+    def test_404_for_missing_pizza_or_restaurant(self):
+        '''returns a 404 status code and error message if a POST request to /restaurant_pizzas references a non-existent pizza or restaurant.'''
+
+        with app.app_context():
+            fake = Faker()
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            db.session.add(pizza)
+            db.session.add(restaurant)
+            db.session.commit()
+
+            response = app.test_client().post(
+                '/restaurant_pizzas',
+                json={
+                    "price": 5,
+                    "pizza_id": pizza.id,
+                    "restaurant_id": 0,
+                }
+            )
+
+            assert response.status_code == 404
+            assert response.json['error'] == "Restaurant not found"
+
+            response = app.test_client().post(
+                '/restaurant_pizzas',
+                json={
+                    "price": 5,
+                    "pizza_id": 0,
+                    "restaurant_id": restaurant.id,
+                }
+            )
+
+            assert response.status_code == 404
+            assert response.json['error'] == "Pizza not found"
@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy.exc import IntegrityError
 from app import app
 from models import db, Restaurant, Pizza, RestaurantPizza
 from faker import Faker
@@ -14,15 +15,16 @@ class TestRestaurantPizza:
 
             pizza = Pizza(
                 name=Faker().name(), ingredients="Dough, Sauce, Cheese")
-            restaurant = Restaurant(name=Faker().name(), address='Main St')
+            restaurant_1 = Restaurant(name=Faker().name(), address='Main St')
+            restaurant_2 = Restaurant(name=Faker().name(), address='Main St')
             db.session.add(pizza)
-            db.session.add(restaurant)
+            db.session.add_all([restaurant_1, restaurant_2])
             db.session.commit()
 
             restaurant_pizza_1 = RestaurantPizza(
-                restaurant_id=restaurant.id, pizza_id=pizza.id, price=1)
+                restaurant_id=restaurant_1.id, pizza_id=pizza.id, price=1)
             restaurant_pizza_2 = RestaurantPizza(
-                restaurant_id=restaurant.id, pizza_id=pizza.id, price=30)
+                restaurant_id=restaurant_2.id, pizza_id=pizza.id, price=30)
             db.session.add(restaurant_pizza_1)
             db.session.add(restaurant_pizza_2)
             db.session.commit()
@@ -62,3 +64,25 @@ class TestRestaurantPizza:
                     restaurant_id=restaurant.id, pizza_id=pizza.id, price=31)
                 db.session.add(restaurant_pizza)
                 db.session.commit()
+
+    def test_unique_restaurant_and_pizza(self):
+        '''does not allow the same pizza to be added to a restaurant twice.'''
+
+        with app.app_context():
+
+            pizza = Pizza(
+                name=Faker().name(), ingredients="Dough, Sauce, Cheese")
+            restaurant = Restaurant(name=Faker().name(), address='Main St')
+            db.session.add(pizza)
+            db.session.add(restaurant)
+            db.session.commit()
+
+            db.session.add(RestaurantPizza(
+                restaurant_id=restaurant.id, pizza_id=pizza.id, price=10))
+            db.session.commit()
+
+            with pytest.raises(IntegrityError):
+                db.session.add(RestaurantPizza(
+                    restaurant_id=restaurant.id, pizza_id=pizza.id, price=12))
+                db.session.commit()
+            db.session.rollback()